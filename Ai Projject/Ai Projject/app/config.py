@@ -21,15 +21,39 @@ API_VERSION = "1.0.0"
 
 # FAISS Configuration
 EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+EMBEDDING_BATCH_SIZE = 128
+EMBEDDING_MAX_INFLIGHT = 4  # Concurrent encode batches across all ingest requests
 FAISS_DIMENSION = 384  # Dimension of MiniLM model
+# Vectors are L2-normalized and searched by inner product (cosine similarity).
+# "HNSW32_SQ8" gives logarithmic-time ANN search over int8-quantized vectors
+# (4x smaller than float32); use "HNSW32" for full precision. SQ indexes are
+# trained on the first ingested batch. IVF/PQ indexes need thousands of training
+# vectors, so a new one is refused at startup; train them offline and place the
+# file at FAISS_INDEX_PATH instead.
+FAISS_INDEX_FACTORY = os.getenv("FAISS_INDEX_FACTORY", "HNSW32_SQ8")
+FAISS_HNSW_EF_CONSTRUCTION = 40
+FAISS_HNSW_EF_SEARCH = 64
+FAISS_IVF_NPROBE = 16  # Inverted lists scanned per query (pre-trained IVF indexes)
+# Read-only workers memory-map the index and reload it when the writer saves.
+# Only IVF indexes keep their inverted lists on disk when mapped; HNSW and flat
+# indexes are read fully into each worker's memory.
+FAISS_READ_ONLY = os.getenv("FAISS_READ_ONLY", "False").lower() == "true"
 CHUNK_SIZE = 512
 TOP_K_RESULTS = 3
+QUERY_EMBEDDING_CACHE_SIZE = 10000
+# Ingested data is flushed to disk in the background instead of on every
+# request: every PERSIST_INTERVAL_SECONDS, or sooner once this many chunks wait.
+PERSIST_INTERVAL_SECONDS = 30
+PERSIST_MAX_PENDING_CHUNKS = 1000
 
 # Language Configuration
 SUPPORTED_LANGUAGES = ["en", "ja"]
 DEFAULT_LANGUAGE = "en"
+TRANSLATION_CACHE_SIZE = 4096
 
 # Server Configuration
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8000))
+# Each worker loads its own models and index; see FAISS_READ_ONLY for replicas
+WORKERS = int(os.getenv("WORKERS", 1))
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
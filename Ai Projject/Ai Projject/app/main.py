@@ -1,15 +1,19 @@
 """FastAPI application factory and main entry point."""
 from fastapi import FastAPI, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse, ORJSONResponse
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import logging
 
-from app.config import API_TITLE, API_VERSION, HOST, PORT
-from app.middleware import log_requests, api_key_middleware
+from app.config import API_TITLE, API_VERSION, HOST, PORT, WORKERS, FAISS_READ_ONLY
+from app.middleware import auth_and_logging_middleware
 from app.models import HealthCheckResponse
 from app.routers import ingest, retrieve, generate
 from app.services.faiss_service import FAISSService
+from app.services.registry import (
+    get_faiss_service, load_faiss_service, load_language_detector, load_translator
+)
 
 # Configure logging
 logging.basicConfig(
@@ -18,22 +22,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize services
-faiss_service = FAISSService()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle."""
     logger.info("Healthcare RAG Assistant starting up...")
+    # Load shared models up front instead of on the first request
+    faiss_service = load_faiss_service()
+    load_language_detector()
+    load_translator()
     logger.info(f"FAISS index ready with {faiss_service.get_documents_count()} documents")
+    flush_task = asyncio.create_task(faiss_service.run_periodic_flush())
     yield
     logger.info("Healthcare RAG Assistant shutting down...")
+    flush_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await flush_task
+    faiss_service.flush()
 
 # Create FastAPI app
 app = FastAPI(
     title=API_TITLE,
     version=API_VERSION,
     description="Healthcare Knowledge Assistant powered by RAG (Retrieval-Augmented Generation)",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -47,8 +58,7 @@ app.add_middleware(
 )
 
 # Add custom middleware
-app.middleware("http")(log_requests)
-app.middleware("http")(api_key_middleware)
+app.middleware("http")(auth_and_logging_middleware)
 
 # Include routers
 app.include_router(ingest.router)
@@ -65,8 +75,10 @@ async def root():
         "health": "/health"
     }
 
-@app.get("/health", response_model=HealthCheckResponse, tags=["health"])
-async def health_check():
+# The returned model is already validated, so skip FastAPI's output re-validation;
+# `responses` keeps the schema in the OpenAPI docs
+@app.get("/health", response_model=None, responses={200: {"model": HealthCheckResponse}}, tags=["health"])
+async def health_check(faiss_service: FAISSService = Depends(get_faiss_service)) -> HealthCheckResponse:
     """Health check endpoint."""
     return HealthCheckResponse(
         status="healthy",
@@ -77,11 +89,20 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    logger.info(f"Starting server on {HOST}:{PORT}")
+    workers = WORKERS
+    if workers > 1 and not FAISS_READ_ONLY:
+        # Writer workers each hold their own index, and their flushes would overwrite each other
+        logger.error(
+            f"WORKERS={WORKERS} requires FAISS_READ_ONLY=true; "
+            f"starting 1 worker so ingested documents are not lost"
+        )
+        workers = 1
+    logger.info(f"Starting server on {HOST}:{PORT} with {workers} worker(s)")
     uvicorn.run(
         "app.main:app",
         host=HOST,
         port=PORT,
+        workers=workers,
         reload=False,
         log_level="info"
     )
@@ -15,6 +15,17 @@ class IngestResponse(BaseModel):
     document_id: Optional[str] = None
     chunks_created: Optional[int] = None
 
+class IngestBatchRequest(BaseModel):
+    """Request model for ingesting several documents at once."""
+    items: list[IngestRequest] = Field(..., min_length=1, description="Documents to ingest")
+
+class IngestBatchResponse(BaseModel):
+    """Response model for batch document ingestion."""
+    success: bool
+    message: str
+    results: list[IngestResponse]
+    chunks_created: int
+
 class RetrieveRequest(BaseModel):
     """Request model for document retrieval."""
     query: str = Field(..., description="Search query")
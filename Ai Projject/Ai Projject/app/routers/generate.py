@@ -1,20 +1,25 @@
 """LLM response generation router."""
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.models import GenerateRequest, GenerateResponse, Document
 from app.services.faiss_service import FAISSService
 from app.services.language_detector import LanguageDetector
 from app.services.translator import Translator
 from app.services.llm_service import MockLLMService
+from app.services.registry import (
+    get_faiss_service, get_language_detector, get_translator
+)
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/generate", tags=["generation"])
-faiss_service = FAISSService()
-lang_detector = LanguageDetector()
-translator = Translator()
 
 @router.post("", response_model=GenerateResponse)
-async def generate_response(request: GenerateRequest):
+async def generate_response(
+    request: GenerateRequest,
+    faiss_service: FAISSService = Depends(get_faiss_service),
+    lang_detector: LanguageDetector = Depends(get_language_detector),
+    translator: Translator = Depends(get_translator)
+):
     """
     Generate a medical assistant response using RAG.
     
@@ -38,7 +43,7 @@ async def generate_response(request: GenerateRequest):
         output_language = request.output_language or query_language
         
         # Retrieve relevant documents
-        retrieved_docs = faiss_service.retrieve_documents(query=request.query, top_k=3)
+        retrieved_docs = await faiss_service.retrieve_documents_async(query=request.query, top_k=3)
         
         # Translate query to LLM's preferred language if needed
         llm_query = request.query
@@ -1,17 +1,22 @@
 """Document ingestion router."""
-from fastapi import APIRouter, HTTPException, status
-from app.models import IngestRequest, IngestResponse
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.models import (
+    IngestRequest, IngestResponse, IngestBatchRequest, IngestBatchResponse
+)
 from app.services.faiss_service import FAISSService
 from app.services.language_detector import LanguageDetector
+from app.services.registry import get_faiss_service, get_language_detector
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ingest", tags=["ingestion"])
-faiss_service = FAISSService()
-lang_detector = LanguageDetector()
 
 @router.post("", response_model=IngestResponse)
-async def ingest_document(request: IngestRequest):
+async def ingest_document(
+    request: IngestRequest,
+    faiss_service: FAISSService = Depends(get_faiss_service),
+    lang_detector: LanguageDetector = Depends(get_language_detector)
+):
     """
     Ingest a medical document.
     
@@ -31,7 +36,7 @@ async def ingest_document(request: IngestRequest):
         language = request.language or lang_detector.detect(request.content)
         
         # Ingest document
-        success, message, chunks = faiss_service.ingest_document(
+        success, message, chunks = await faiss_service.ingest_document(
             content=request.content,
             filename=request.filename,
             language=language
@@ -58,3 +63,64 @@ async def ingest_document(request: IngestRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error ingesting document: {str(e)}"
         )
+
+@router.post("/batch", response_model=IngestBatchResponse)
+async def ingest_documents(
+    request: IngestBatchRequest,
+    faiss_service: FAISSService = Depends(get_faiss_service),
+    lang_detector: LanguageDetector = Depends(get_language_detector)
+):
+    """
+    Ingest several medical documents in one request.
+    
+    - **items**: Documents in the same shape as `/ingest` requests
+    
+    Documents are embedded together and added to the index in one update.
+    Each item gets its own result; invalid items are skipped, not fatal.
+    """
+    try:
+        results = [None] * len(request.items)
+        documents = []
+        positions = []
+        
+        for position, item in enumerate(request.items):
+            # Validate content
+            if not item.content or len(item.content.strip()) < 50:
+                results[position] = IngestResponse(
+                    success=False,
+                    message="Document content must be at least 50 characters",
+                    document_id=item.filename
+                )
+                continue
+            
+            documents.append({
+                "content": item.content,
+                "filename": item.filename,
+                "language": item.language or lang_detector.detect(item.content)
+            })
+            positions.append(position)
+        
+        # Ingest all valid documents together
+        outcomes = await faiss_service.ingest_documents(documents) if documents else []
+        for position, doc, (success, message, chunks) in zip(positions, documents, outcomes):
+            results[position] = IngestResponse(
+                success=success,
+                message=message,
+                document_id=doc["filename"],
+                chunks_created=chunks
+            )
+        
+        ingested = sum(1 for result in results if result.success)
+        return IngestBatchResponse(
+            success=ingested == len(results),
+            message=f"Ingested {ingested} of {len(results)} documents",
+            results=results,
+            chunks_created=sum(result.chunks_created or 0 for result in results)
+        )
+    
+    except Exception as e:
+        logger.error(f"Error in batch ingest endpoint: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error ingesting documents: {str(e)}"
+        )
@@ -1,17 +1,21 @@
 """Document retrieval router."""
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.models import RetrieveRequest, RetrieveResponse, Document
 from app.services.faiss_service import FAISSService
 from app.services.language_detector import LanguageDetector
+from app.services.registry import get_faiss_service, get_language_detector
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/retrieve", tags=["retrieval"])
-faiss_service = FAISSService()
-lang_detector = LanguageDetector()
 
-@router.post("", response_model=RetrieveResponse)
-async def retrieve_documents(request: RetrieveRequest):
+# Responses are built from validated models; skip re-validating them on the way out
+@router.post("", response_model=None, responses={200: {"model": RetrieveResponse}})
+async def retrieve_documents(
+    request: RetrieveRequest,
+    faiss_service: FAISSService = Depends(get_faiss_service),
+    lang_detector: LanguageDetector = Depends(get_language_detector)
+) -> RetrieveResponse:
     """
     Retrieve relevant medical documents.
     
@@ -31,7 +35,7 @@ async def retrieve_documents(request: RetrieveRequest):
         language = request.language or lang_detector.detect(request.query)
         
         # Retrieve documents
-        results = faiss_service.retrieve_documents(
+        results = await faiss_service.retrieve_documents_async(
             query=request.query,
             top_k=request.top_k or 3
         )
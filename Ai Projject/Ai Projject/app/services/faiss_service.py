@@ -1,17 +1,26 @@
 """FAISS vector database service for semantic search."""
+import asyncio
+import threading
 import faiss
 import numpy as np
+import torch
 import json
+import os
+from functools import lru_cache
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
 import logging
-from typing import List, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any
 from app.config import (
-    FAISS_INDEX_PATH, FAISS_METADATA_PATH, EMBEDDING_MODEL,
-    FAISS_DIMENSION, CHUNK_SIZE
+    FAISS_INDEX_PATH, FAISS_METADATA_PATH, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_INFLIGHT, FAISS_DIMENSION, FAISS_INDEX_FACTORY,
+    FAISS_HNSW_EF_CONSTRUCTION, FAISS_HNSW_EF_SEARCH, FAISS_IVF_NPROBE, FAISS_READ_ONLY,
+    CHUNK_SIZE, QUERY_EMBEDDING_CACHE_SIZE, PERSIST_INTERVAL_SECONDS,
+    PERSIST_MAX_PENDING_CHUNKS
 )
 from app.utils.helpers import (
-    chunk_text, save_metadata, load_metadata, generate_document_id
+    chunk_text_with_offsets, save_metadata, load_metadata, generate_document_id,
+    temp_path_for, replace_atomic
 )
 
 logger = logging.getLogger(__name__)
@@ -19,26 +28,179 @@ logger = logging.getLogger(__name__)
 class FAISSService:
     """Service for managing FAISS vector index."""
     
-    def __init__(self):
-        """Initialize FAISS service with embeddings model."""
+    def __init__(self, read_only: bool = FAISS_READ_ONLY):
+        """
+        Initialize FAISS service with embeddings model.
+        
+        Args:
+            read_only: Memory-map the stored index and reject ingestion
+        """
+        self.read_only = read_only
         self.model = SentenceTransformer(EMBEDDING_MODEL)
-        self.index = self._load_or_create_index()
+        if torch.cuda.is_available():
+            self.model.half()
+        self.model.eval()
+        # Repeated queries skip the model; embeddings do not depend on the index
+        self._encode_query = lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)(self._embed_query)
+        self._encode_semaphore = asyncio.Semaphore(EMBEDDING_MAX_INFLIGHT)
+        # FAISS indexes are not safe for concurrent writes
+        self._index_lock = threading.Lock()
+        # One flush at a time, so an older snapshot never lands on disk after a newer one
+        self._flush_lock = threading.Lock()
+        # Chunks added since the last flush to disk
+        self._pending_chunks = 0
         self.metadata = load_metadata(FAISS_METADATA_PATH)
+        self._index_mtime = self._get_index_mtime()
+        self.index = self._load_or_create_index()
+        self.index_to_doc_id = self._build_index_lookup()
+    
+    def _build_index_lookup(self) -> Dict[int, str]:
+        """Map FAISS vector positions back to their document IDs."""
+        return {meta["faiss_index"]: doc_id for doc_id, meta in self.metadata.items()}
+    
+    @staticmethod
+    def _get_index_mtime() -> int:
+        """Modification time of the stored index, or 0 if it does not exist."""
+        try:
+            return FAISS_INDEX_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
     
-    def _load_or_create_index(self) -> faiss.IndexFlatL2:
+    @staticmethod
+    def _prefetch_index_file():
+        """Start kernel readahead of the whole index file before FAISS parses it."""
+        if not hasattr(os, "posix_fadvise"):
+            return
+        try:
+            fd = os.open(FAISS_INDEX_PATH, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.debug(f"Index readahead skipped: {e}")
+    
+    def _load_or_create_index(self) -> faiss.Index:
         """Load existing FAISS index or create new one."""
         if FAISS_INDEX_PATH.exists():
             try:
                 logger.info(f"Loading FAISS index from {FAISS_INDEX_PATH}")
+                self._prefetch_index_file()
+                if self.read_only:
+                    return self._configure_search(faiss.read_index(
+                        str(FAISS_INDEX_PATH), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+                    ))
                 index = faiss.read_index(str(FAISS_INDEX_PATH))
-                return index
+                if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+                    return self._configure_search(index)
+                logger.warning("Stored FAISS index uses L2 distance, rebuilding for cosine similarity")
+                return self._rebuild_index()
             except Exception as e:
                 logger.error(f"Error loading index: {e}, creating new index")
         
         logger.info("Creating new FAISS index")
-        return faiss.IndexFlatL2(FAISS_DIMENSION)
+        return self._create_index()
+    
+    def _create_index(self) -> faiss.Index:
+        """Create an empty inner-product index from FAISS_INDEX_FACTORY."""
+        index = faiss.index_factory(FAISS_DIMENSION, FAISS_INDEX_FACTORY, faiss.METRIC_INNER_PRODUCT)
+        # IVF/PQ training needs at least one point per centroid, far more than a single
+        # ingest provides; such indexes must be trained offline and loaded from disk
+        if not index.is_trained and not self._is_scalar_quantized(index):
+            raise ValueError(
+                f"FAISS_INDEX_FACTORY={FAISS_INDEX_FACTORY!r} needs training data before it "
+                f"can store vectors; use a flat, HNSW or SQ index, or load a pre-trained index"
+            )
+        hnsw = getattr(index, "hnsw", None)
+        if hnsw is not None:
+            hnsw.efConstruction = FAISS_HNSW_EF_CONSTRUCTION
+        return self._configure_search(index)
+    
+    @staticmethod
+    def _configure_search(index: faiss.Index) -> faiss.Index:
+        """Apply the configured HNSW/IVF search breadth to a new or loaded index."""
+        hnsw = getattr(index, "hnsw", None)
+        if hnsw is not None:
+            hnsw.efSearch = FAISS_HNSW_EF_SEARCH
+        try:
+            faiss.extract_index_ivf(index).nprobe = FAISS_IVF_NPROBE
+        except RuntimeError:
+            pass  # Not an IVF index
+        return index
+    
+    @staticmethod
+    def _is_scalar_quantized(index: faiss.Index) -> bool:
+        """Whether vectors are stored by a scalar quantizer (directly or as HNSW storage)."""
+        index = faiss.downcast_index(index)
+        storage = getattr(index, "storage", None)
+        if storage is not None:
+            index = faiss.downcast_index(storage)
+        return isinstance(index, faiss.IndexScalarQuantizer)
+    
+    def _train_if_needed(self, index: faiss.Index, embeddings: np.ndarray):
+        """Train an untrained (scalar-quantized) index on the first batch of embeddings."""
+        if index.is_trained:
+            return
+        if self._is_scalar_quantized(index):
+            # Normalized components lie in [-1, 1]; training on those bounds too
+            # keeps scalar quantizer ranges valid when the first batch is tiny
+            bounds = np.ones((2, FAISS_DIMENSION), dtype='float32')
+            bounds[1] = -1
+            embeddings = np.vstack([embeddings, bounds])
+        index.train(embeddings)
     
-    def ingest_document(self, content: str, filename: str, language: str = "en") -> Tuple[bool, str, int]:
+    def _rebuild_index(self) -> faiss.Index:
+        """Re-embed stored chunks into a fresh index in their original order."""
+        index = self._create_index()
+        entries = sorted(self.metadata.items(), key=lambda item: item[1]["faiss_index"])
+        if entries:
+            embeddings = self._encode_texts([meta["content"] for _, meta in entries])
+            self._train_if_needed(index, embeddings)
+            index.add(embeddings)
+            self.metadata = {
+                doc_id: {**meta, "faiss_index": position}
+                for position, (doc_id, meta) in enumerate(entries)
+            }
+            save_metadata(self.metadata, FAISS_METADATA_PATH)
+        self.index = index
+        self._save_index()
+        return index
+    
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in large batches as L2-normalized float32 vectors."""
+        with torch.inference_mode():
+            embeddings = self.model.encode(
+                texts,
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        # Already float32 unless the model runs in half precision; no copy otherwise
+        return embeddings.astype('float32', copy=False)
+    
+    async def _encode_texts_async(self, chunks: List[str]) -> np.ndarray:
+        """Embed chunks in the thread pool, one job per sub-batch."""
+        loop = asyncio.get_running_loop()
+        
+        async def encode_batch(batch: List[str]) -> np.ndarray:
+            async with self._encode_semaphore:
+                return await loop.run_in_executor(None, self._encode_texts, batch)
+        
+        batches = [
+            chunks[i:i + EMBEDDING_BATCH_SIZE]
+            for i in range(0, len(chunks), EMBEDDING_BATCH_SIZE)
+        ]
+        return np.vstack(await asyncio.gather(*(encode_batch(b) for b in batches)))
+    
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a single query as a read-only (1, dim) float32 array."""
+        query_embedding = self._encode_texts([query])
+        # Cached arrays are shared between requests
+        query_embedding.flags.writeable = False
+        return query_embedding
+    
+    async def ingest_document(self, content: str, filename: str, language: str = "en") -> Tuple[bool, str, int]:
         """
         Ingest a document into FAISS index.
         
@@ -50,44 +212,112 @@ class FAISSService:
         Returns:
             Tuple of (success, message, chunks_created)
         """
+        results = await self.ingest_documents(
+            [{"content": content, "filename": filename, "language": language}]
+        )
+        return results[0]
+    
+    async def ingest_documents(self, documents: List[Dict[str, str]]) -> List[Tuple[bool, str, int]]:
+        """
+        Ingest several documents with one embedding pass and one index update.
+        
+        Args:
+            documents: Dicts with "content", "filename" and "language" keys
+        
+        Returns:
+            One (success, message, chunks_created) tuple per document
+        """
+        if self.read_only:
+            return [(False, "FAISS index is read-only in this worker", 0)] * len(documents)
+        
         try:
-            # Chunk the document
-            chunks = chunk_text(content, chunk_size=CHUNK_SIZE)
-            
-            if not chunks:
-                return False, "Document too small or empty", 0
+            # Chunk every document into parallel (texts, offsets) lists, then embed all texts together
+            doc_chunks = [
+                chunk_text_with_offsets(doc["content"], chunk_size=CHUNK_SIZE) for doc in documents
+            ]
+            all_chunks = [chunk for chunks, _ in doc_chunks for chunk in chunks]
             
-            # Generate embeddings for all chunks
-            embeddings = self.model.encode(chunks, show_progress_bar=False)
-            embeddings = np.array(embeddings).astype('float32')
+            # Generate embeddings for all chunks without blocking the event loop
+            embeddings = await self._encode_texts_async(all_chunks) if all_chunks else None
             
-            # Add to FAISS index
-            initial_size = self.index.ntotal
-            self.index.add(embeddings)
+            # FAISS add and metadata writes take the index lock, so keep them off the event loop
+            results, flush_now = await asyncio.get_running_loop().run_in_executor(
+                None, self._add_chunks, documents, doc_chunks, embeddings
+            )
             
-            # Save metadata for each chunk
-            for i, chunk in enumerate(chunks):
-                doc_id = generate_document_id(filename, i)
-                self.metadata[doc_id] = {
-                    "filename": filename,
-                    "chunk_index": i,
-                    "content": chunk,
-                    "language": language,
-                    "faiss_index": initial_size + i
-                }
-            
-            # Persist index and metadata
-            self._save_index()
-            save_metadata(self.metadata, FAISS_METADATA_PATH)
+            # Persist index and metadata (otherwise left to the periodic flush)
+            if flush_now:
+                await asyncio.get_running_loop().run_in_executor(None, self.flush)
             
-            message = f"Successfully ingested {len(chunks)} chunks from {filename}"
-            logger.info(message)
-            return True, message, len(chunks)
+            return results
         
         except Exception as e:
             error_msg = f"Error ingesting document: {str(e)}"
             logger.error(error_msg)
-            return False, error_msg, 0
+            return [(False, error_msg, 0)] * len(documents)
+    
+    def _add_chunks(
+        self,
+        documents: List[Dict[str, str]],
+        doc_chunks: List[Tuple[List[str], List[int]]],
+        embeddings: Optional[np.ndarray]
+    ) -> Tuple[List[Tuple[bool, str, int]], bool]:
+        """
+        Add embedded chunks to the index and metadata under the index lock.
+        
+        Args:
+            documents: Documents being ingested
+            doc_chunks: Per-document (texts, offsets) from the chunker
+            embeddings: Vectors for all chunks in order, or None if there are none
+        
+        Returns:
+            Per-document results, and whether enough is pending to flush now
+        """
+        results = []
+        with self._index_lock:
+            position = self.index.ntotal
+            if embeddings is not None:
+                # Add to FAISS index (scalar-quantized variants are trained on the first batch)
+                self._train_if_needed(self.index, embeddings)
+                self.index.add(embeddings)
+            
+            # Save metadata for each chunk
+            for doc, (chunks, offsets) in zip(documents, doc_chunks):
+                if not chunks:
+                    results.append((False, "Document too small or empty", 0))
+                    continue
+                
+                for i, (chunk, offset) in enumerate(zip(chunks, offsets)):
+                    doc_id = generate_document_id(doc["filename"], i)
+                    previous = self.metadata.get(doc_id)
+                    if previous is not None:
+                        # Re-ingested chunk: its old vector stays in the index but must not resolve
+                        self.index_to_doc_id.pop(previous["faiss_index"], None)
+                    self.metadata[doc_id] = {
+                        "filename": doc["filename"],
+                        "chunk_index": i,
+                        "char_offset": offset,
+                        "content": chunk,
+                        "language": doc["language"],
+                        "faiss_index": position
+                    }
+                    self.index_to_doc_id[position] = doc_id
+                    position += 1
+                
+                message = f"Successfully ingested {len(chunks)} chunks from {doc['filename']}"
+                logger.info(message)
+                results.append((True, message, len(chunks)))
+            
+            self._pending_chunks += 0 if embeddings is None else len(embeddings)
+            flush_now = self._pending_chunks >= PERSIST_MAX_PENDING_CHUNKS
+        
+        return results, flush_now
+    
+    async def retrieve_documents_async(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Run `retrieve_documents` in the executor; query encoding and search stay off the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.retrieve_documents, query, top_k
+        )
     
     def retrieve_documents(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """
@@ -100,30 +330,31 @@ class FAISSService:
         Returns:
             List of retrieved documents with similarity scores
         """
+        if self.read_only:
+            self.reload_if_changed()
+        
         if self.index.ntotal == 0:
             logger.warning("FAISS index is empty")
             return []
         
         try:
-            # Generate embedding for query
-            query_embedding = self.model.encode([query], show_progress_bar=False)
-            query_embedding = np.array(query_embedding).astype('float32')
+            # Generate (or reuse) embedding for query
+            query_embedding = self._encode_query(query)
             
             # Search in FAISS
-            distances, indices = self.index.search(query_embedding, top_k)
+            with self._index_lock:
+                distances, indices = self.index.search(query_embedding, top_k)
             
             results = []
-            for distance, idx in zip(distances[0], indices):
-                # Find metadata for this index
-                metadata_entry = None
-                for doc_id, meta in self.metadata.items():
-                    if meta["faiss_index"] == int(idx):
-                        metadata_entry = meta
-                        break
+            for distance, idx in zip(distances[0], indices[0]):
+                # Look up metadata for this index (-1 marks an empty slot)
+                doc_id = self.index_to_doc_id.get(int(idx))
+                metadata_entry = self.metadata.get(doc_id) if doc_id else None
                 
-                if metadata_entry:
-                    # Convert L2 distance to similarity score (0-1)
-                    similarity = 1 / (1 + float(distance))
+                # Skip orphaned vectors left behind when a chunk was re-ingested
+                if metadata_entry and metadata_entry["faiss_index"] == int(idx):
+                    # Inner product of normalized vectors is cosine similarity
+                    similarity = float(distance)
                     results.append({
                         "doc_id": doc_id,
                         "content": metadata_entry["content"],
@@ -138,23 +369,96 @@ class FAISSService:
             logger.error(f"Error retrieving documents: {e}")
             return []
     
+    def reload_if_changed(self) -> bool:
+        """Reopen the stored index and metadata if the writer has saved since."""
+        mtime = self._get_index_mtime()
+        if mtime == self._index_mtime:
+            return False
+        
+        logger.info("FAISS index changed on disk, reloading")
+        self._index_mtime = mtime
+        self.metadata = load_metadata(FAISS_METADATA_PATH)
+        self.index = self._load_or_create_index()
+        self.index_to_doc_id = self._build_index_lookup()
+        return True
+    
     def get_documents_count(self) -> int:
         """Get total number of indexed documents."""
         return len(self.metadata)
     
-    def _save_index(self):
+    def flush(self) -> bool:
+        """
+        Persist the index and metadata if anything was ingested since the last flush.
+        
+        Returns:
+            True if data was written successfully
+        """
+        with self._flush_lock:
+            with self._index_lock:
+                pending = self._pending_chunks
+                if not pending:
+                    return False
+                metadata = dict(self.metadata)
+                # Streamed to disk rather than copied in memory; every other holder of
+                # this lock runs in the executor, so the event loop never waits on it
+                try:
+                    tmp_path = self._stage_index()
+                except Exception as e:
+                    logger.error(f"Error saving FAISS index: {e}")
+                    return False
+                self._pending_chunks = 0
+            
+            # Metadata first, then swap the index in: readers reload when the index file changes
+            if save_metadata(metadata, FAISS_METADATA_PATH):
+                try:
+                    replace_atomic(tmp_path, FAISS_INDEX_PATH)
+                    logger.info(f"FAISS index saved to {FAISS_INDEX_PATH}")
+                    return True
+                except OSError as e:
+                    logger.error(f"Error saving FAISS index: {e}")
+            
+            # Keep the chunks pending so the next flush retries
+            with self._index_lock:
+                self._pending_chunks += pending
+            return False
+    
+    async def run_periodic_flush(self, interval: float = PERSIST_INTERVAL_SECONDS):
+        """Flush pending ingests every `interval` seconds until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            if self._pending_chunks:
+                await loop.run_in_executor(None, self.flush)
+    
+    def _stage_index(self) -> Path:
+        """Stream the index to its staging file beside FAISS_INDEX_PATH and return that path."""
+        FAISS_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = temp_path_for(FAISS_INDEX_PATH)
+        faiss.write_index(self.index, str(tmp_path))
+        return tmp_path
+    
+    def _save_index(self) -> bool:
         """Save FAISS index to disk."""
         try:
-            FAISS_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
-            faiss.write_index(self.index, str(FAISS_INDEX_PATH))
+            # Same durable swap as the metadata, so memory-mapped readers never see a partial file
+            replace_atomic(self._stage_index(), FAISS_INDEX_PATH)
             logger.info(f"FAISS index saved to {FAISS_INDEX_PATH}")
+            return True
         except Exception as e:
             logger.error(f"Error saving FAISS index: {e}")
+            return False
     
     def clear_index(self):
         """Clear the FAISS index and metadata."""
-        self.index = faiss.IndexFlatL2(FAISS_DIMENSION)
-        self.metadata = {}
-        self._save_index()
-        save_metadata(self.metadata, FAISS_METADATA_PATH)
+        if self.read_only:
+            logger.warning("Cannot clear a read-only FAISS index")
+            return
+        
+        with self._index_lock:
+            self.index = self._create_index()
+            self.metadata = {}
+            self.index_to_doc_id = {}
+            # Mark dirty so the flush below writes out the empty state
+            self._pending_chunks = 1
+        self.flush()
         logger.info("FAISS index cleared")
@@ -1,12 +1,20 @@
 """Language detection service."""
 from langdetect import detect, DetectorFactory
 import logging
+import re
 
 # Set seed for reproducibility
 DetectorFactory.seed = 0
 
 logger = logging.getLogger(__name__)
 
+# Hiragana, Katakana, or Kanji
+_JAPANESE_RE = re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]')
+# Kana alone is unambiguous; Kanji is shared with Chinese
+_KANA_RE = re.compile(r'[\u3040-\u309F\u30A0-\u30FF]')
+# Languages ASCII-only text can be resolved between without langdetect
+_ASCII_RESOLVABLE = frozenset({"en", "ja"})
+
 class LanguageDetector:
     """Detect language of text."""
     
@@ -22,8 +30,16 @@ class LanguageDetector:
         Returns:
             Language code (en, ja, or en as fallback)
         """
+        sample = text[:500]  # Use first 500 chars
+        
+        # Cheap script checks before the profile-based classifier
+        if "ja" in supported_languages and _KANA_RE.search(sample):
+            return "ja"
+        if sample.isascii() and _ASCII_RESOLVABLE.issuperset(supported_languages):
+            return "en"
+        
         try:
-            detected = detect(text[:500])  # Use first 500 chars
+            detected = detect(sample)
             if detected in supported_languages:
                 return detected
             return "en"  # Default to English
@@ -34,7 +50,4 @@ class LanguageDetector:
     @staticmethod
     def is_japanese(text: str) -> bool:
         """Check if text contains Japanese characters."""
-        import re
-        # Check for Hiragana, Katakana, or Kanji
-        japanese_pattern = re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]')
-        return bool(japanese_pattern.search(text))
+        return bool(_JAPANESE_RE.search(text))
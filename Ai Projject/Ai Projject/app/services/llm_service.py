@@ -1,5 +1,6 @@
 """Mock LLM service for generating responses."""
 import logging
+import re
 from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
@@ -75,6 +76,19 @@ Key Considerations:
         }
     }
     
+    # Response type keywords, checked in priority order
+    RESPONSE_KEYWORDS = {
+        "diabetes": re.compile(r"diabetes|blood sugar|glucose", re.IGNORECASE),
+        "hypertension": re.compile(r"hypertension|blood pressure|high bp", re.IGNORECASE),
+    }
+    
+    # (language, response_type) -> response text, flattened once at class load
+    RESPONSE_TABLE = {
+        (language, response_type): text
+        for language, responses in MEDICAL_RESPONSES.items()
+        for response_type, text in responses.items()
+    }
+    
     @staticmethod
     def generate_response(
         query: str,
@@ -93,20 +107,17 @@ Key Considerations:
             Generated response text
         """
         # Determine response type based on query keywords
-        query_lower = query.lower()
-        response_type = "default"
-        
-        if any(word in query_lower for word in ["diabetes", "blood sugar", "glucose"]):
-            response_type = "diabetes"
-        elif any(word in query_lower for word in ["hypertension", "blood pressure", "high bp"]):
-            response_type = "hypertension"
+        response_type = next(
+            (name for name, pattern in MockLLMService.RESPONSE_KEYWORDS.items() if pattern.search(query)),
+            "default"
+        )
         
-        # Get appropriate response
-        responses = MockLLMService.MEDICAL_RESPONSES.get(language, MockLLMService.MEDICAL_RESPONSES["en"])
-        response = responses.get(response_type, responses["default"])
+        # Get appropriate response (unsupported languages fall back to English)
+        table = MockLLMService.RESPONSE_TABLE
+        response = table.get((language, response_type)) or table[("en", response_type)]
         
-        # Include document references in response
+        # Include document references in response, built as a single string
         if retrieved_documents:
-            response += f"\n\n**Referenced Medical Sources:** {len(retrieved_documents)} document(s) analyzed."
+            return f"{response}\n\n**Referenced Medical Sources:** {len(retrieved_documents)} document(s) analyzed."
         
         return response
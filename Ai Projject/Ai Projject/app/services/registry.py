@@ -0,0 +1,46 @@
+"""Process-wide service instances shared across routers."""
+import threading
+from typing import Callable, TypeVar
+from app.services.faiss_service import FAISSService
+from app.services.language_detector import LanguageDetector
+from app.services.translator import Translator
+
+T = TypeVar("T")
+
+
+def _singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """Build `factory()` once; the lock keeps concurrent first calls from building two."""
+    instance = None
+    lock = threading.Lock()
+    
+    def load() -> T:
+        nonlocal instance
+        if instance is None:
+            with lock:
+                if instance is None:
+                    instance = factory()
+        return instance
+    
+    return load
+
+
+# Loaders build the instance on first use (the app lifespan calls them at startup)
+load_faiss_service = _singleton(FAISSService)
+load_language_detector = _singleton(LanguageDetector)
+load_translator = _singleton(Translator)
+
+
+# Dependencies are async so FastAPI awaits them inline instead of hopping to the threadpool
+async def get_faiss_service() -> FAISSService:
+    """Return the shared FAISS service (loads the embedding model once)."""
+    return load_faiss_service()
+
+
+async def get_language_detector() -> LanguageDetector:
+    """Return the shared language detector."""
+    return load_language_detector()
+
+
+async def get_translator() -> Translator:
+    """Return the shared translator (loads the translation models once)."""
+    return load_translator()
@@ -1,6 +1,10 @@
 """Translation service for bilingual support."""
-from transformers import pipeline
+import torch
+from collections import OrderedDict
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 import logging
+from typing import Dict, List
+from app.config import TRANSLATION_CACHE_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -8,15 +12,29 @@ class Translator:
     """Translate text between languages."""
     
     def __init__(self):
-        """Initialize translation pipelines."""
+        """Initialize translation models."""
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # LRU of (direction, text) -> translation shared by single and batch calls
+        self._cache = OrderedDict()
         try:
-            self.en_to_ja = pipeline("translation_en_to_ja", model="Helsinki-NLP/opus-mt-en-ja")
-            self.ja_to_en = pipeline("translation_ja_to_en", model="Helsinki-NLP/opus-mt-ja-en")
+            self.en_to_ja = self._load_model("Helsinki-NLP/opus-mt-en-ja")
+            self.ja_to_en = self._load_model("Helsinki-NLP/opus-mt-ja-en")
         except Exception as e:
             logger.warning(f"Translation models not loaded: {e}")
             self.en_to_ja = None
             self.ja_to_en = None
     
+    def _load_model(self, model_name: str):
+        """Load a tokenizer/model pair: FP16 on GPU, dynamic int8 on CPU."""
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        if self.device == "cuda":
+            model = model.half().to(self.device)
+        else:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+        return tokenizer, model
+    
     def translate(self, text: str, source_lang: str, target_lang: str) -> str:
         """
         Translate text from source to target language.
@@ -43,28 +61,63 @@ class Translator:
         
         return text
     
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """
+        Translate several texts in one batched forward pass.
+        
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code (en/ja)
+            target_lang: Target language code (en/ja)
+        
+        Returns:
+            Translated texts, or the original texts if translation fails
+        """
+        if source_lang == "en" and target_lang == "ja":
+            return self._generate(self.en_to_ja, texts, "EN-JA")
+        
+        if source_lang == "ja" and target_lang == "en":
+            return self._generate(self.ja_to_en, texts, "JA-EN")
+        
+        return list(texts)
+    
     def _translate_en_to_ja(self, text: str) -> str:
         """Translate English to Japanese."""
-        if not self.en_to_ja:
-            logger.warning("EN-JA translator not available")
-            return text
-        
-        try:
-            result = self.en_to_ja(text, max_length=500)
-            return result[0]["translation_text"]
-        except Exception as e:
-            logger.error(f"Translation error: {e}")
-            return text
+        return self._generate(self.en_to_ja, [text], "EN-JA")[0]
     
     def _translate_ja_to_en(self, text: str) -> str:
         """Translate Japanese to English."""
-        if not self.ja_to_en:
-            logger.warning("JA-EN translator not available")
-            return text
+        return self._generate(self.ja_to_en, [text], "JA-EN")[0]
+    
+    def _generate(self, translator, texts: List[str], direction: str) -> List[str]:
+        """Translate a batch, running the model only on texts not already cached."""
+        if not translator:
+            logger.warning(f"{direction} translator not available")
+            return list(texts)
         
-        try:
-            result = self.ja_to_en(text, max_length=500)
-            return result[0]["translation_text"]
-        except Exception as e:
-            logger.error(f"Translation error: {e}")
-            return text
+        found: Dict[str, str] = {}
+        for text in texts:
+            key = (direction, text)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                found[text] = self._cache[key]
+        
+        misses = [text for text in dict.fromkeys(texts) if text not in found]
+        if misses:
+            tokenizer, model = translator
+            try:
+                inputs = tokenizer(misses, return_tensors="pt", padding=True, truncation=True).to(self.device)
+                with torch.inference_mode():
+                    outputs = model.generate(**inputs, max_length=500)
+                translated = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            except Exception as e:
+                logger.error(f"Translation error: {e}")
+                return [found.get(text, text) for text in texts]
+            
+            for text, result in zip(misses, translated):
+                found[text] = result
+                self._cache[(direction, text)] = result
+            while len(self._cache) > TRANSLATION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        
+        return [found[text] for text in texts]
@@ -1,54 +1,190 @@
 """Utility helper functions."""
 import json
+import mmap
+import os
+import re
+from bisect import bisect_right
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 import logging
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Metadata is then read from the JSON file only
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+# Latin sentence ends need trailing whitespace (so "3.5 mg" stays whole); Japanese ones do not
+_SENTENCE_END = re.compile(r'[.!?](?:\s+|$)|[。！？]\s*')
+
+# Latest parsed metadata per path, stored with the (source, mtime_ns, size) it was read at;
+# a rewrite replaces the entry rather than adding one
+_METADATA_CACHE_SIZE = 64
+_metadata_cache: "OrderedDict[str, Tuple[tuple, Dict[str, Any]]]" = OrderedDict()
+
 def chunk_text(text: str, chunk_size: int = 512, overlap: int = 50) -> List[str]:
     """
-    Split text into overlapping chunks.
+    Split text into overlapping chunks, breaking at sentence ends where possible.
     
     Args:
         text: Text to chunk
-        chunk_size: Size of each chunk
+        chunk_size: Maximum size of each chunk
         overlap: Overlap between chunks
     
     Returns:
         List of text chunks
     """
-    chunks = []
-    step = chunk_size - overlap
+    return chunk_text_with_offsets(text, chunk_size, overlap)[0]
+
+def chunk_text_with_offsets(text: str, chunk_size: int = 512, overlap: int = 50) -> Tuple[List[str], List[int]]:
+    """
+    Chunk text like `chunk_text`, also returning where each chunk starts.
+    
+    Args:
+        text: Text to chunk
+        chunk_size: Maximum size of each chunk
+        overlap: Overlap between chunks
+    
+    Returns:
+        Parallel lists of chunk texts and their character offsets in `text`
+    """
+    texts = []
+    offsets = []
+    # Offsets just past each sentence end; a window breaks at the last one it holds
+    boundaries = [m.end() for m in _SENTENCE_END.finditer(text)]
+    text_length = len(text)
+    # A shorter break would yield a chunk that is dropped or leaves no overlap
+    min_break = max(50, overlap)
+    start = 0
     
-    for i in range(0, len(text), step):
-        chunk = text[i:i + chunk_size]
-        if len(chunk) > 50:  # Only include meaningful chunks
-            chunks.append(chunk)
+    while start < text_length:
+        end = start + chunk_size
+        if end < text_length:
+            i = bisect_right(boundaries, end) - 1
+            if i >= 0 and boundaries[i] - start > min_break:
+                end = boundaries[i]
+        else:
+            end = text_length
+        
+        if end - start > 50:  # Only include meaningful chunks
+            texts.append(text[start:end])
+            offsets.append(start)
+        
+        if end >= text_length:
+            break
+        start = max(end - overlap, start + 1)
     
-    return chunks
+    return texts, offsets
+
+def _dumps(data: Any) -> bytes:
+    """Serialize to indented UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+def _loads(data: memoryview) -> Any:
+    """Parse UTF-8 JSON from a bytes-like buffer."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+def temp_path_for(path: Path) -> Path:
+    """Staging file written beside `path` before it is swapped in."""
+    return path.with_suffix(path.suffix + '.tmp')
+
+def replace_atomic(tmp_path: Path, path: Path):
+    """fsync an already written staging file, then swap it in with os.replace."""
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_atomic(path: Path, data: bytes):
+    """Write bytes beside `path`, fsync, then swap the file in with os.replace."""
+    tmp_path = temp_path_for(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _sidecar_path(path: Path) -> Path:
+    """Binary msgpack copy of a metadata file, kept beside the JSON export."""
+    return path.with_suffix('.mpk')
+
+def _metadata_source(path: Path, st: os.stat_result) -> Path:
+    """Pick the sidecar when it was written no earlier than the JSON file (`st`)."""
+    if msgpack is None:
+        return path
+    try:
+        if _sidecar_path(path).stat().st_mtime_ns >= st.st_mtime_ns:
+            return _sidecar_path(path)
+    except FileNotFoundError:
+        pass
+    return path
 
 def save_metadata(metadata: Dict[str, Any], path: Path) -> bool:
-    """Save metadata to JSON file."""
+    """Save metadata to JSON file (plus a msgpack sidecar when available)."""
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        # Serialize up front so the file is written in one call, not per token
+        write_atomic(path, _dumps(metadata))
+        # Written second so a complete save leaves the sidecar the newer file
+        if msgpack is not None:
+            write_atomic(_sidecar_path(path), msgpack.packb(metadata, use_bin_type=True))
         return True
-    except Exception as e:
+    except (OSError, TypeError, ValueError) as e:
+        # Disk errors, or values the encoders cannot serialize
         logger.error(f"Error saving metadata: {e}")
         return False
 
 def load_metadata(path: Path) -> Dict[str, Any]:
-    """Load metadata from JSON file."""
+    """Load metadata, preferring an up-to-date msgpack sidecar (callers get their own top-level dict)."""
+    # One stat settles the missing and empty cases before anything is opened
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {}
+    if st.st_size == 0:
+        return {}
+    
     try:
-        if not path.exists():
-            return {}
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
+        source = _metadata_source(path, st)
+        with open(source, 'rb') as f:
+            st = os.fstat(f.fileno())
+            # mmap cannot map an empty file
+            if st.st_size == 0:
+                return {}
+            
+            key = str(path)
+            version = (str(source), st.st_mtime_ns, st.st_size)
+            cached = _metadata_cache.get(key)
+            if cached is not None and cached[0] == version:
+                _metadata_cache.move_to_end(key)
+                return dict(cached[1])
+            
+            # Parse straight from the page cache instead of copying into a buffer
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                if source is path:
+                    metadata = _loads(view)
+                else:
+                    metadata = msgpack.unpackb(view, raw=False)
+    except (OSError, ValueError) as e:
+        # ValueError covers malformed JSON (orjson and stdlib) and msgpack data
         logger.error(f"Error loading metadata: {e}")
         return {}
+    
+    _metadata_cache[key] = (version, metadata)
+    _metadata_cache.move_to_end(key)
+    if len(_metadata_cache) > _METADATA_CACHE_SIZE:
+        _metadata_cache.popitem(last=False)
+    return dict(metadata)
 
 def generate_document_id(filename: str, chunk_index: int) -> str:
     """Generate unique document ID."""
-    return f"{filename.replace('.txt', '')}_{chunk_index}"
+    return f"{filename.removesuffix('.txt')}_{chunk_index}"
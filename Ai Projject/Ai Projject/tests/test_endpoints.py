@@ -1,75 +1,122 @@
 """Test API endpoints."""
+import importlib.util
+import orjson
 import pytest
-from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient, Headers
 from app.main import app
 
-client = TestClient(app)
+pytestmark = pytest.mark.anyio
 
 API_KEY = "T1-ai-secret-key-2025"
-HEADERS = {"X-API-Key": API_KEY}
+# Built once: httpx keeps Headers as pre-encoded byte pairs
+HEADERS = Headers({"X-API-Key": API_KEY})
+JSON_HEADERS = Headers({**HEADERS, "Content-Type": "application/json"})
+
+def rj(response):
+    """Decode a JSON response body with orjson."""
+    return orjson.loads(response.content)
+
+# Request bodies encoded once at import and sent as raw bytes
+_INGEST_BODY = orjson.dumps({
+    "filename": "test_diabetes.txt",
+    "content": "Type 2 diabetes management guidelines. Lorem ipsum dolor sit amet, consectetur adipiscing elit.",
+    "language": "en"
+})
+_INGEST_BATCH_BODY = orjson.dumps({
+    "items": [
+        {
+            "filename": "test_hypertension.txt",
+            "content": "Hypertension management guidelines. Lorem ipsum dolor sit amet, consectetur adipiscing elit.",
+            "language": "en"
+        },
+        {
+            "filename": "test_short.txt",
+            "content": "Too short.",
+            "language": "en"
+        }
+    ]
+})
+_INGEST_NO_KEY_BODY = orjson.dumps({
+    "filename": "test.txt",
+    "content": "Some medical content about healthcare and treatment options for patients.",
+})
+_RETRIEVE_BODY = orjson.dumps({
+    "query": "diabetes management",
+    "language": "en"
+})
+_GENERATE_BODY = orjson.dumps({
+    "query": "What is diabetes?",
+    "language": "en"
+})
+
+@pytest.fixture(scope="module")
+def anyio_backend():
+    """Run async tests on asyncio (uvloop when installed, as uvicorn uses), one event loop per module."""
+    # uvicorn[standard] skips uvloop on Windows
+    if importlib.util.find_spec("uvloop") is None:
+        return "asyncio"
+    return "asyncio", {"use_uvloop": True}
+
+@pytest.fixture(scope="module")
+async def client(anyio_backend):
+    """In-process ASGI client shared by every test in the module."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
 
 class TestHealthEndpoint:
     """Test health check endpoint."""
     
-    def test_health_check_success(self):
+    async def test_health_check_success(self, client):
         """Test health check returns 200."""
-        response = client.get("/health")
+        response = await client.get("/health")
         assert response.status_code == 200
-        data = response.json()
+        data = rj(response)
         assert "status" in data
         assert "version" in data
 
 class TestIngestEndpoint:
     """Test document ingestion."""
     
-    def test_ingest_valid_document(self):
+    async def test_ingest_valid_document(self, client):
         """Test ingesting a valid document."""
-        payload = {
-            "filename": "test_diabetes.txt",
-            "content": "Type 2 diabetes management guidelines. Lorem ipsum dolor sit amet, consectetur adipiscing elit.",
-            "language": "en"
-        }
-        response = client.post("/ingest", json=payload, headers=HEADERS)
+        response = await client.post("/ingest", content=_INGEST_BODY, headers=JSON_HEADERS)
         assert response.status_code == 200
-        data = response.json()
+        data = rj(response)
         assert data["success"] is True
         assert "chunks_created" in data
     
-    def test_ingest_missing_api_key(self):
+    async def test_ingest_batch(self, client):
+        """Test ingesting several documents in one request."""
+        response = await client.post("/ingest/batch", content=_INGEST_BATCH_BODY, headers=JSON_HEADERS)
+        assert response.status_code == 200
+        data = rj(response)
+        assert data["success"] is False
+        assert [r["success"] for r in data["results"]] == [True, False]
+        assert data["chunks_created"] == data["results"][0]["chunks_created"]
+    
+    async def test_ingest_missing_api_key(self, client):
         """Test ingest without API key fails."""
-        payload = {
-            "filename": "test.txt",
-            "content": "Some medical content about healthcare and treatment options for patients.",
-        }
-        response = client.post("/ingest", json=payload)
+        response = await client.post("/ingest", content=_INGEST_NO_KEY_BODY, headers={"Content-Type": "application/json"})
         assert response.status_code == 401
 
 class TestRetrieveEndpoint:
     """Test document retrieval."""
     
-    def test_retrieve_with_query(self):
+    async def test_retrieve_with_query(self, client):
         """Test retrieving documents."""
-        payload = {
-            "query": "diabetes management",
-            "language": "en"
-        }
-        response = client.post("/retrieve", json=payload, headers=HEADERS)
+        response = await client.post("/retrieve", content=_RETRIEVE_BODY, headers=JSON_HEADERS)
         assert response.status_code == 200
-        data = response.json()
+        data = rj(response)
         assert data["success"] is True
         assert "results" in data
 
 class TestGenerateEndpoint:
     """Test LLM response generation."""
     
-    def test_generate_response(self):
+    async def test_generate_response(self, client):
         """Test generating a response."""
-        payload = {
-            "query": "What is diabetes?",
-            "language": "en"
-        }
-        response = client.post("/generate", json=payload, headers=HEADERS)
+        response = await client.post("/generate", content=_GENERATE_BODY, headers=JSON_HEADERS)
         assert response.status_code == 200
-        data = response.json()
+        data = rj(response)
         assert data["success"] is True
         assert "response" in data
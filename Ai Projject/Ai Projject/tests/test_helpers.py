@@ -0,0 +1,41 @@
+"""Test utility helpers."""
+from app.utils import helpers
+from app.utils.helpers import (
+    chunk_text, chunk_text_with_offsets, load_metadata, save_metadata
+)
+
+class TestChunkText:
+    """Test sentence-aware chunking."""
+    
+    def test_short_leading_sentence_is_kept(self):
+        """Test a leading sentence shorter than the minimum chunk is not dropped."""
+        text = "Diabetes overview. " + "Type 2 diabetes is a chronic condition in which " * 15
+        chunks = chunk_text(text, chunk_size=512, overlap=50)
+        assert chunks[0].startswith("Diabetes overview.")
+    
+    def test_overlap_is_kept(self):
+        """Test consecutive chunks overlap when sentences outgrow the window."""
+        text = ("A" * 600 + ". ") * 4
+        texts, offsets = chunk_text_with_offsets(text, chunk_size=512, overlap=50)
+        for i in range(len(texts) - 1):
+            assert offsets[i] + len(texts[i]) - offsets[i + 1] == 50
+    
+    def test_offsets_match_text(self):
+        """Test every chunk is the slice of the text at its offset."""
+        text = "Insulin lowers blood glucose. Metformin is a first-line drug. " * 40
+        texts, offsets = chunk_text_with_offsets(text, chunk_size=200, overlap=50)
+        assert texts
+        assert offsets[0] == 0
+        for chunk, offset in zip(texts, offsets):
+            assert text[offset:offset + len(chunk)] == chunk
+
+class TestLoadMetadata:
+    """Test the parsed metadata cache."""
+    
+    def test_rewrites_replace_cache_entry(self, tmp_path):
+        """Test repeated saves of one file keep a single cached copy."""
+        path = tmp_path / "metadata.json"
+        for i in range(10):
+            assert save_metadata({"doc_0": {"faiss_index": i}}, path)
+            assert load_metadata(path) == {"doc_0": {"faiss_index": i}}
+        assert sum(1 for key in helpers._metadata_cache if key == str(path)) == 1